@@ -34,10 +34,11 @@ export default function AdminApp() {
 
   
   // Auction State
-  const [auctionItem, setAuctionItem] = useState({ name: "", debt: 0 })
+  const [auctionItem, setAuctionItem] = useState({ id: null, name: "", debt: 0 })
   const [catType, setCatType] = useState("supplier")
-  const [auctionWinner, setAuctionWinner] = useState("")
-  const [auctionPrice, setAuctionPrice] = useState("")
+  const [reservePrice, setReservePrice] = useState("")
+  const [lots, setLots] = useState([]) // Live sealed-bid lots
+  const [auctionResults, setAuctionResults] = useState([])
 
   // --- DATA SYNC ---
   const fetchData = async () => {
@@ -52,6 +53,11 @@ export default function AdminApp() {
         setCatalog(catRes.data)
     } catch (e) { console.error("Catalog Error") }
 
+    try {
+        const lotRes = await axios.get(`${ENGINE_URL}/auction/lots`)
+        setLots(lotRes.data)
+    } catch (e) { console.error("Lots Error") }
+
     // --- NEW: 4. GET LOGS ---
     try {
         const logRes = await axios.get(`${ENGINE_URL}/admin/logs`)
@@ -62,10 +68,15 @@ export default function AdminApp() {
     const configObj = {}
     if (cData) cData.forEach(c => configObj[c.key] = c.value)
     
+    // Lock state lives in ONE config row (phase + per-team overrides)
+    let phase = { phase: 'OPEN', locked: [], unlocked: [] }
+    try { if (configObj.game_phase) phase = JSON.parse(configObj.game_phase) } catch (e) {}
+    const canTrade = (code) => phase.locked.includes(code) ? false : phase.phase === 'OPEN' ? true : phase.phase === 'LOCKED' && phase.unlocked.includes(code)
+
     const processed = (tData || []).map(t => ({
       ...t,
       score: (t.cash * 0.6) + ((100 - t.carbon_debt) * 10),
-      is_locked: t.last_action_round >= 900 // Simple check for lock
+      is_locked: !canTrade(t.code) || t.last_action_round >= (phase.window ?? parseInt(configObj.current_round || 1)) // same rule as student app
     }))
     setTeams(processed)
     setConfig(configObj)
@@ -92,7 +103,7 @@ export default function AdminApp() {
         setLogs(prev => [`--- YEAR ${config.current_round} RESULTS ---`, ...newLogs, ...prev])
         
         fetchData()
-    } catch (e) { alert("Engine Error"); console.error(e) }
+    } catch (e) { alert("Engine Error: " + (e.response?.data?.detail || e.message)); console.error(e) }
     setLoading(false)
   }
 
@@ -112,23 +123,26 @@ export default function AdminApp() {
           fetchData()
       }
   }
-  const handleAwardAuction = async () => {
-    if(!confirm(`Confirm Sale:\n${auctionItem.name} to ${auctionWinner} for $${auctionPrice}?`)) return;
-
+  // LIVE AUCTION (students bid from their app, we settle everyone at once)
+  const handleOpenLot = async () => {
+    if(!auctionItem.id) return alert("Select an item first");
     try {
-        await axios.post(`${ENGINE_URL}/admin/grant-auction-item`, {
-            team_code: auctionWinner,
-            item_name: auctionItem.name,
-            price: parseInt(auctionPrice),
-            debt_reduction: auctionItem.debt
+        await axios.post(`${ENGINE_URL}/admin/auction/open`, {
+            item_id: auctionItem.id,
+            reserve: parseInt(reservePrice || 0)
         })
-        alert(`✅ Sold! $${auctionPrice} deducted from ${auctionWinner}.`)
-        setAuctionWinner("")
-        setAuctionPrice("")
+        setReservePrice("")
+        fetchData()
+    } catch (err) { alert("Error: " + (err.response?.data?.detail || err.message)) }
+  }
+
+  const handleCloseLots = async () => {
+    if(!confirm(`Close ${lots.length} lot(s) and charge every winner?`)) return;
+    try {
+        const res = await axios.post(`${ENGINE_URL}/admin/auction/close`, {})
+        setAuctionResults(res.data.results)
         fetchData()
-    } catch (err) {
-        alert("Error: Team not found or connection failed.")
-    }
+    } catch (err) { alert("Settlement failed (bids kept, try again): " + (err.response?.data?.detail || err.message)) }
   }
 
   // TEAM ACTIONS
@@ -463,7 +477,41 @@ export default function AdminApp() {
                         <Gavel size={48} className="text-purple-400" />
                     </div>
                     <h2 className="text-2xl font-bold text-white">Live Auction Console</h2>
-                    <p className="text-slate-400">Award items to the highest bidder immediately.</p>
+                    <p className="text-slate-400">Open a lot, let teams bid from their phones, then close to settle every winner at once.</p>
+                </div>
+
+                {/* LIVE SEALED BIDS */}
+                <div className="bg-slate-900 p-6 rounded-xl border border-slate-800 space-y-4">
+                    <h3 className="font-bold text-purple-400 uppercase text-xs tracking-wider">Live Sealed Bids</h3>
+                    <div className="flex gap-2">
+                        <div className="flex-1 p-3 bg-slate-950 rounded text-xs text-slate-400 border border-slate-800">
+                            Selected Item: <span className="text-white font-bold">{auctionItem.name || "None"}</span>
+                        </div>
+                        <input type="number" className="w-32 bg-slate-950 border border-slate-700 p-3 rounded text-white font-mono"
+                            placeholder="Reserve $" value={reservePrice} onChange={e => setReservePrice(e.target.value)}/>
+                        <button onClick={handleOpenLot} className="bg-purple-600 hover:bg-purple-500 text-white px-6 rounded font-bold">Open Lot</button>
+                    </div>
+
+                    {lots.map(lot => (
+                        <div key={lot.lot_id} className="flex justify-between items-center p-3 bg-slate-950 rounded border border-slate-800">
+                            <div>
+                                <span className="text-white font-bold">#{lot.lot_id} {lot.name}</span>
+                                <span className="text-xs text-slate-500 ml-2">Reserve ${lot.reserve}</span>
+                            </div>
+                            <span className="text-xs font-mono text-purple-300">{lot.bid_count} sealed bids</span>
+                        </div>
+                    ))}
+                    {lots.length === 0 && <div className="text-slate-500 text-sm text-center italic">No lots open.</div>}
+
+                    <button onClick={handleCloseLots} disabled={lots.length === 0} className="w-full bg-emerald-600 hover:bg-emerald-500 text-white py-3 rounded-lg font-bold disabled:opacity-50">
+                        Close & Settle All Lots
+                    </button>
+
+                    {auctionResults.map(r => (
+                        <div key={r.lot_id} className="text-sm font-mono text-slate-300">
+                            #{r.lot_id} {r.item}: {r.winner ? <span className="text-emerald-400">{r.winner} paid ${r.price}</span> : <span className="text-slate-500">no valid bids</span>}
+                        </div>
+                    ))}
                 </div>
 
                 <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
@@ -475,7 +523,7 @@ export default function AdminApp() {
                             {catalog.filter(i => i.category === 'auction').map((item) => (
                                 <button 
                                     key={item.id}
-                                    onClick={() => setAuctionItem({name: item.name, debt: item.debt_effect})} 
+                                    onClick={() => setAuctionItem({id: item.id, name: item.name, debt: item.debt_effect})} 
                                     className={`w-full p-4 rounded-lg border text-left transition-all ${auctionItem.name === item.name ? 'bg-purple-600 border-purple-500 text-white' : 'bg-slate-950 border-slate-700 text-slate-400 hover:border-purple-500'}`}
                                 >
                                     <div className="font-bold">{item.name}</div>
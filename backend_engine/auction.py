@@ -0,0 +1,183 @@
+import itertools
+import threading
+
+# --- LIVE SEALED-BID AUCTION ---
+# Bids live only in memory while a lot is open, so the bid path never
+# touches the `teams` table. The database is written once, when the lots
+# are closed and every winner is settled in a single batch.
+
+_lot_ids = itertools.count(1)
+_bid_seq = itertools.count(1)
+_registry_lock = threading.Lock()
+LOTS = {}
+
+
+class AuctionError(Exception):
+    """Raised when a bid or lot action is not allowed."""
+
+
+class Lot:
+    """One item on the block, with its own sealed bid book."""
+
+    def __init__(self, lot_id, name, debt_effect, reserve, cash_snapshot):
+        self.lot_id = lot_id
+        self.name = name
+        self.debt_effect = debt_effect
+        self.reserve = reserve
+        self.status = "open"
+        self.bids = {}  # team_code -> (amount, seq)
+        self.settlement = None  # computed once, resent as-is on retry
+        self.lock = threading.Lock()
+        # Cash seen when the lot opened. Used to reject impossible bids
+        # without a database read; settlement re-checks against live cash.
+        self._cash_snapshot = cash_snapshot
+
+    def place_bid(self, team_code, amount):
+        if amount <= 0:
+            raise AuctionError("Bid must be positive")
+        if amount < self.reserve:
+            raise AuctionError(f"Minimum bid is ${self.reserve}")
+        if team_code not in self._cash_snapshot:
+            raise AuctionError("Team not found")
+        if amount > self._cash_snapshot[team_code]:
+            raise AuctionError("Insufficient Funds")
+
+        with self.lock:
+            if self.status != "open":
+                raise AuctionError("Lot is closed")
+            # Sealed bid: a team may revise its own bid, never see others
+            self.bids[team_code] = (amount, next(_bid_seq))
+
+    def ranked_bids(self):
+        """Highest bid first; on a tie the earlier bid wins."""
+        return sorted(self.bids.items(), key=lambda b: (-b[1][0], b[1][1]))
+
+    def summary(self):
+        return {
+            "lot_id": self.lot_id,
+            "name": self.name,
+            "debt_effect": self.debt_effect,
+            "reserve": self.reserve,
+            "status": self.status,
+            "bid_count": len(self.bids),
+        }
+
+
+def open_lot(name, debt_effect, reserve, cash_snapshot):
+    """Puts a new lot on the block and returns it."""
+    with _registry_lock:
+        lot = Lot(next(_lot_ids), name, debt_effect, reserve, cash_snapshot)
+        LOTS[lot.lot_id] = lot
+    return lot
+
+
+def open_lots():
+    """Snapshot of lots still taking bids."""
+    with _registry_lock:
+        lots = list(LOTS.values())
+    return [lot for lot in lots if lot.status == "open"]
+
+
+def get_lot(lot_id):
+    lot = LOTS.get(lot_id)
+    if not lot:
+        raise AuctionError("Lot not found")
+    return lot
+
+
+def close_lots(lot_ids=None):
+    """
+    Stops bidding and claims the lots for settlement (default: all of them).
+    Lots another close call is already settling are skipped, so two closes
+    can't settle the same lot twice. A lot whose settlement failed is left
+    "closed" and gets picked up again by the next call, together with the
+    rest of its batch.
+    """
+    with _registry_lock:
+        if lot_ids is None:
+            lots = list(LOTS.values())
+        else:
+            lots = [get_lot(i) for i in lot_ids]
+        for lot in list(lots):
+            if lot.settlement:
+                lots += [l for l in lot.settlement["lots"] if l not in lots]
+
+        claimed = []
+        for lot in lots:
+            with lot.lock:
+                if lot.status in ("open", "closed"):
+                    lot.status = "settling"
+                    claimed.append(lot)
+    return claimed
+
+
+def release_lots(lots):
+    """Settlement failed: keep the lots (bids intact) for a retry."""
+    for lot in lots:
+        with lot.lock:
+            lot.status = "closed"
+
+
+def split_settled(lots):
+    """
+    Separates lots whose settlement was already computed (a failed attempt
+    that may or may not have reached the store) from ones still to price.
+    Returns: (earlier_settlements, unpriced_lots)
+    """
+    earlier = []
+    for lot in lots:
+        if lot.settlement and lot.settlement not in earlier:
+            earlier.append(lot.settlement)
+    return earlier, [lot for lot in lots if not lot.settlement]
+
+
+def attach_settlement(lots, rows, results):
+    """Pins the computed rows to the lots so a retry resends exactly these."""
+    settlement = {"lots": lots, "rows": rows, "results": results}
+    for lot in lots:
+        lot.settlement = settlement
+    return settlement
+
+
+def pick_winners(lots, teams):
+    """
+    Decides every winner for a batch of closed lots.
+    Walks each lot's bids from the top and takes the first team that can
+    still pay, tracking cash across lots so one team can't overspend.
+    Returns: (updated_team_rows, results)
+    """
+    cash = {t['code']: t['cash'] for t in teams}
+    # Only the columns settlement owns, so the upsert can't clobber anything else
+    rows = {t['code']: {k: t.get(k) for k in ("code", "cash", "carbon_debt", "assets")} for t in teams}
+    touched = {}
+    results = []
+
+    for lot in lots:
+        winner = None
+        for team_code, (amount, _) in lot.ranked_bids():
+            if team_code in cash and cash[team_code] >= amount:
+                winner = (team_code, amount)
+                break
+
+        if not winner:
+            results.append({"lot_id": lot.lot_id, "item": lot.name, "winner": None, "price": 0})
+            continue
+
+        team_code, amount = winner
+        cash[team_code] -= amount
+        row = rows[team_code]
+        current_assets = row.get('assets') or ""
+        row['cash'] = cash[team_code]
+        row['carbon_debt'] = max(0, row['carbon_debt'] + lot.debt_effect)
+        row['assets'] = f"{current_assets},{lot.name}".strip(",")
+        touched[team_code] = row
+        results.append({"lot_id": lot.lot_id, "item": lot.name, "winner": team_code, "price": amount})
+
+    return list(touched.values()), results
+
+
+def forget_lots(lots):
+    """Drops settled lots from memory."""
+    with _registry_lock:
+        for lot in lots:
+            LOTS.pop(lot.lot_id, None)
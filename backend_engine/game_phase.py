@@ -0,0 +1,137 @@
+import json
+import threading
+
+# --- GAME PHASE STATE MACHINE ---
+# Replaces the old trick of writing last_action_round = 0 / 999 to every
+# team. The whole phase lives in ONE config row ("game_phase"), cached here,
+# so a transition is a single write and clients get a single realtime event.
+
+OPEN = "OPEN"
+LOCKED = "LOCKED"
+SETTLING = "SETTLING"
+RESULTS = "RESULTS"
+
+TRANSITIONS = {
+    OPEN: {LOCKED, SETTLING},
+    LOCKED: {OPEN, SETTLING},
+    SETTLING: {RESULTS, OPEN, LOCKED},  # way out if settlement fails
+    RESULTS: {OPEN, LOCKED, SETTLING},  # re-running a round is allowed
+}
+
+CONFIG_KEY = "game_phase"
+
+_lock = threading.Lock()
+_state = None
+
+
+class PhaseError(Exception):
+    """Raised on a transition the state machine doesn't allow."""
+
+
+# "window" numbers trading windows. buy_supplier stamps last_action_round
+# with it, so a team has bought in this window when its stamp >= window.
+# Reopening trading just bumps the number; no team rows are touched.
+
+def _default(window=1):
+    return {"phase": OPEN, "locked": [], "unlocked": [], "window": window}
+
+
+def load(raw, default_window=1):
+    """
+    Seeds the cache from the stored config value (JSON string or None).
+    default_window is used by records saved before windows existed.
+    """
+    global _state
+    try:
+        state = json.loads(raw) if raw else _default(default_window)
+    except (ValueError, TypeError):
+        state = _default(default_window)
+    with _lock:
+        _state = {
+            "phase": state.get("phase", OPEN),
+            "locked": set(state.get("locked", [])),
+            "unlocked": set(state.get("unlocked", [])),
+            "window": state.get("window", default_window),
+        }
+
+
+def is_loaded():
+    return _state is not None
+
+
+def dump():
+    """The cached record as the JSON string stored in config."""
+    with _lock:
+        return json.dumps({
+            "phase": _state["phase"],
+            "locked": sorted(_state["locked"]),
+            "unlocked": sorted(_state["unlocked"]),
+            "window": _state["window"],
+        })
+
+
+def current():
+    return _state["phase"]
+
+
+def window():
+    return _state["window"]
+
+
+def has_bought(last_action_round):
+    """True if the team's purchase stamp falls in the current window."""
+    return (last_action_round or 0) >= _state["window"]
+
+
+def can_trade(team_code):
+    """
+    In-memory check used by every purchase handler. A lock override always
+    wins; an unlock override only lifts LOCKED. SETTLING and RESULTS are
+    closed to everyone so nothing lands while a round is being written.
+    """
+    if team_code in _state["locked"]:
+        return False
+    if _state["phase"] == OPEN:
+        return True
+    if _state["phase"] == LOCKED:
+        return team_code in _state["unlocked"]
+    return False
+
+
+def move_to(phase, clear_overrides=False, new_window=False):
+    """
+    Moves to a new phase. clear_overrides drops per-team locks/unlocks;
+    new_window lets every team buy again.
+    """
+    with _lock:
+        if phase != _state["phase"] and phase not in TRANSITIONS[_state["phase"]]:
+            raise PhaseError(f"Can't go from {_state['phase']} to {phase}")
+        _state["phase"] = phase
+        if clear_overrides:
+            _state["locked"].clear()
+            _state["unlocked"].clear()
+        if new_window:
+            _state["window"] += 1
+
+
+def lock_team(team_code):
+    """Per-team override: locked whatever the phase."""
+    with _lock:
+        _state["unlocked"].discard(team_code)
+        _state["locked"].add(team_code)
+
+
+def unlock_team(team_code):
+    """Per-team override: may trade while the phase is LOCKED."""
+    with _lock:
+        _state["locked"].discard(team_code)
+        if _state["phase"] != OPEN:
+            _state["unlocked"].add(team_code)
+
+
+def reset():
+    """Back to a fresh OPEN phase (factory reset)."""
+    with _lock:
+        _state.update(_default())
+        _state["locked"] = set()
+        _state["unlocked"] = set()
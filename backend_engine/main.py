@@ -1,18 +1,29 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from fastapi.responses import JSONResponse
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
 import os
+import json
 from dotenv import load_dotenv
 import game_logic
+import auction
+import game_phase
+import store
 
 # 1. SETUP
 load_dotenv()
 url = os.environ.get("SUPABASE_URL")
 key = os.environ.get("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+supabase: Client = create_client(url, key, options=ClientOptions(postgrest_client_timeout=store.TIMEOUT))
 app = FastAPI()
 
+@app.exception_handler(store.StoreUnavailable)
+def store_unavailable(request, exc):
+    """Flaky network -> clean 503 the apps can retry, not a 500."""
+    return JSONResponse(status_code=503, content={"detail": f"Database unreachable: {exc}"})
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -25,15 +36,39 @@ app.add_middleware(
 def log_transaction(team_code: str, round_num: int, action: str, details: str):
     """Saves an event to the Master Log."""
     try:
-        supabase.table("master_log").insert({
+        store.write(supabase.table("master_log").insert({
             "team_id": team_code,
             "round": round_num,
             "action_type": action,
             "details": {"msg": details}
-        }).execute()
+        }), idempotent=False, queue=True)
     except Exception as e:
         print(f"⚠️ Log Error: {e}")
 
+def get_phase():
+    """Loads the cached phase record once, then serves it from memory."""
+    if not game_phase.is_loaded():
+        res = store.read(supabase.table("config").select("value").eq("key", game_phase.CONFIG_KEY).maybe_single())
+        # Older stamps hold round numbers, so the current round is the first window
+        current_round = int(store.read(supabase.table("config").select("value").eq("key", "current_round").single()).data['value'])
+        game_phase.load(res.data['value'] if res and res.data else None, default_window=current_round)
+    return game_phase
+
+def save_phase():
+    """Writes the single phase row. Clients get one realtime event from this."""
+    store.write(supabase.table("config").upsert({"key": game_phase.CONFIG_KEY, "value": game_phase.dump()}, on_conflict="key"))
+
+def change_phase(phase, clear_overrides=False, new_window=False):
+    try:
+        get_phase().move_to(phase, clear_overrides, new_window)
+    except game_phase.PhaseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    save_phase()
+
+def require_trading(team_code: str):
+    if not get_phase().can_trade(team_code):
+        raise HTTPException(status_code=400, detail="Trading is locked")
+
 # --- DATA MODELS ---
 
 class TeamInfoUpdate(BaseModel):
@@ -73,11 +108,6 @@ class TeamStatUpdate(BaseModel):
     cash_change: int
     debt_change: int
 
-class AuctionGrantRequest(BaseModel):
-    team_code: str
-    item_name: str
-    price: int
-    debt_reduction: int
 class CreateCodeRequest(BaseModel):
     code: str
     team_id: str
@@ -93,6 +123,19 @@ class CreateCodeRequest(BaseModel):
 class DeleteCatalogRequest(BaseModel):
     item_id: str    
 
+class OpenLotRequest(BaseModel):
+    item_id: str = None      # catalog row (category 'auction')
+    secret_code: str = None  # or a key from AUCTION_ITEMS
+    reserve: int = 0
+
+class BidRequest(BaseModel):
+    team_code: str
+    lot_id: int
+    amount: int
+
+class CloseLotsRequest(BaseModel):
+    lot_ids: list[int] = None
+
 # --- DYNAMIC CATALOG & REVOKE ---
 
 class CatalogItem(BaseModel):
@@ -110,21 +153,60 @@ class RevokeRequest(BaseModel):
 
 @app.get("/")
 def health_check():
-    return {"status": "online"}
+    return {"status": "online", "store": store.status()}
+
+# A priced round whose upsert failed. The write may still have committed
+# (timeout after the commit), so a retry resends these exact rows instead
+# of re-pricing from cash that might already include them.
+pending_round = None
 
 @app.post("/calculate-round")
 def calculate_round(request: RoundRequest):
+    global pending_round
     print(f"\n⚡ STARTING CALCULATION: {request.event_name}")
+    # Close trading BEFORE reading, so no purchase can slip in and be overwritten
+    previous_phase = get_phase().current()
+    change_phase(game_phase.SETTLING)
+
+    if pending_round is None:
+        try:
+            pending_round = price_round(request)
+        except Exception:
+            # Nothing written yet: hand the admin their phase back
+            change_phase(previous_phase)
+            raise
+    else:
+        print(f"   -> ↻ Resending unconfirmed {pending_round['event']} settlement")
+    settlement = pending_round
+
+    # Never queued: if this fails we raise a 503 and stay in SETTLING for a retry
+    if settlement['rows']:
+        store.write(supabase.table("teams").upsert(settlement['rows'], on_conflict="code"), idempotent=False)
+    pending_round = None
+
+    if settlement['log_rows']:
+        try:
+            store.write(supabase.table("master_log").insert(settlement['log_rows']), idempotent=False, queue=True)
+        except Exception as e:
+            print(f"⚠️ Log Error: {e}")
+
+    change_phase(game_phase.RESULTS)
+    return {"status": "success", "updated": len(settlement['rows']), "logs": settlement['logs']}
+
+def price_round(request: RoundRequest):
+    """Works out every team's event result. Reads only; calculate_round writes."""
+    current_round = int(store.read(supabase.table("config").select("value").eq("key", "current_round").single()).data['value'])
     
     # 1. Fetch Data
-    teams = supabase.table("teams").select("*").execute().data
-    catalog_items = supabase.table("catalog").select("*").execute().data
+    teams = store.read(supabase.table("teams").select("*"), fresh=True).data
+    catalog_items = store.read(supabase.table("catalog").select("*")).data
     
     # 2. Create Lookup Map
     catalog_map = {item['name']: item for item in catalog_items}
     
-    updated_count = 0
     logs = []
+    updated_rows = []
+    log_rows = []
 
     for team in teams:
         choice = team.get("inventory_choice", "None")
@@ -186,25 +268,28 @@ def calculate_round(request: RoundRequest):
         new_cash = team['cash'] + cash_change
         new_debt = max(0, team['carbon_debt'] + debt_change)
         
-        supabase.table("teams").update({
-            "cash": new_cash,
-            "carbon_debt": new_debt,
-            "last_action_round": 999
-        }).eq("code", team_code).execute()
+        # Collected, then written as ONE upsert below so a dropped connection
+        # can't leave half the teams settled
+        # Only the columns the round owns, so nothing else gets overwritten
+        updated_rows.append({"code": team_code, "cash": new_cash, "carbon_debt": new_debt})
 
         # --- NEW: LOGGING ---
-        log_transaction(team_code, current_round, "ROUND_CALC", msg)
+        log_rows.append({
+            "team_id": team_code,
+            "round": current_round,
+            "action_type": "ROUND_CALC",
+            "details": {"msg": msg}
+        })
         # --------------------
         
-        updated_count += 1
         logs.append(f"[{team_code}] {msg}")
 
-    return {"status": "success", "updated": updated_count, "logs": logs}
+    return {"event": request.event_name, "rows": updated_rows, "log_rows": log_rows, "logs": logs}
     print(f"\n⚡ STARTING CALCULATION: {request.event_name}")
     
     # 1. Fetch Data
-    teams = supabase.table("teams").select("*").execute().data
-    catalog_items = supabase.table("catalog").select("*").execute().data
+    teams = store.read(supabase.table("teams").select("*")).data
+    catalog_items = store.read(supabase.table("catalog").select("*")).data
     
     # 2. Create Lookup Map
     catalog_map = {item['name']: item for item in catalog_items}
@@ -266,11 +351,10 @@ def calculate_round(request: RoundRequest):
         new_cash = team['cash'] + cash_change
         new_debt = max(0, team['carbon_debt'] + debt_change)
         
-        supabase.table("teams").update({
+        store.write(supabase.table("teams").update({
             "cash": new_cash,
-            "carbon_debt": new_debt,
-            "last_action_round": 999
-        }).eq("code", team_code).execute()
+            "carbon_debt": new_debt
+        }).eq("code", team_code))
         
         updated_count += 1
         logs.append(f"[{team_code}] {msg}")
@@ -279,14 +363,17 @@ def calculate_round(request: RoundRequest):
 
 @app.post("/start-new-year")
 def start_new_year():
-    # Unlock everyone by resetting last_action_round to 0
-    supabase.table("teams").update({"inventory_choice": "None", "last_action_round": 0}).neq("code", "placeholder").execute()
+    global pending_round
+    change_phase(game_phase.OPEN, clear_overrides=True, new_window=True)
+    # A new window frees last year's purchases; the phase unlocks everyone
+    pending_round = None  # an unconfirmed settlement never carries into a new year
+    store.write(supabase.table("teams").update({"inventory_choice": "None"}).neq("code", "placeholder"))
     
-    config_res = supabase.table("config").select("*").eq("key", "current_round").single().execute()
+    config_res = store.read(supabase.table("config").select("*").eq("key", "current_round").single(), fresh=True)
     new_round = int(config_res.data['value']) + 1
     
-    supabase.table("config").update({"value": str(new_round)}).eq("key", "current_round").execute()
-    supabase.table("config").update({"value": "None"}).eq("key", "active_event").execute()
+    store.write(supabase.table("config").update({"value": str(new_round)}).eq("key", "current_round"), idempotent=False)
+    store.write(supabase.table("config").update({"value": "None"}).eq("key", "active_event"))
     return {"status": "success", "round": new_round}
 
 # --- NEW POWER FEATURES ---
@@ -294,23 +381,24 @@ def start_new_year():
 @app.post("/admin/lock-all")
 def lock_all_teams():
     """Forces all teams to stop trading."""
-    supabase.table("teams").update({"last_action_round": 999}).neq("code", "placeholder").execute()
-    return {"status": "success"}
+    change_phase(game_phase.LOCKED, clear_overrides=True)
+    return {"status": "success", "phase": game_phase.current()}
 
 @app.post("/admin/unlock-all")
 def unlock_all_teams():
     """Allows all teams to trade again."""
-    supabase.table("teams").update({"last_action_round": 0}).neq("code", "placeholder").execute()
-    return {"status": "success"}
+    # New window: teams that already bought may buy again, with no row updates
+    change_phase(game_phase.OPEN, clear_overrides=True, new_window=True)
+    return {"status": "success", "phase": game_phase.current()}
 
 @app.post("/admin/global-bonus")
 def global_bonus(req: GlobalActionRequest):
     """Gives money to EVERY team (Stimulus Check)."""
-    # Requires fetching all, calculating, and updating one by one (Supabase limit)
-    teams = supabase.table("teams").select("*").execute().data
-    for team in teams:
-        new_cash = team['cash'] + req.amount
-        supabase.table("teams").update({"cash": new_cash}).eq("code", team['code']).execute()
+    # One upsert for everyone, so a dropped connection can't pay only half the teams
+    teams = store.read(supabase.table("teams").select("code, cash"), fresh=True).data
+    rows = [{"code": team['code'], "cash": team['cash'] + req.amount} for team in teams]
+    if rows:
+        store.write(supabase.table("teams").upsert(rows, on_conflict="code"), idempotent=False)
     return {"status": "success", "count": len(teams)}
 
 # --- STANDARD MANAGEMENT ---
@@ -318,7 +406,7 @@ def global_bonus(req: GlobalActionRequest):
 def add_team(req: ManageTeamRequest):
     """Creates a new team with credentials."""
     print(f"➕ Registering Team: {req.username}")
-    supabase.table("teams").insert({
+    store.write(supabase.table("teams").insert({
         "code": req.team_code,  # Internal ID
         "username": req.username,
         "password": req.password,
@@ -327,50 +415,66 @@ def add_team(req: ManageTeamRequest):
         "carbon_debt": 0,
         "inventory_choice": "None",
         "last_action_round": 0
-    }).execute()
+    }), idempotent=False)
     return {"status": "success"}
 
 @app.post("/admin/remove-team")
 def remove_team(req: ManageTeamRequest):
-    supabase.table("teams").delete().eq("code", req.team_code).execute()
+    store.write(supabase.table("teams").delete().eq("code", req.team_code))
     return {"status": "success"}
 
 @app.post("/admin/toggle-lock")
 def toggle_lock(req: ManageTeamRequest):
-    res = supabase.table("teams").select("last_action_round").eq("code", req.team_code).single().execute()
-    new_val = 0 if res.data['last_action_round'] > 0 else 999
-    supabase.table("teams").update({"last_action_round": new_val}).eq("code", req.team_code).execute()
-    return {"status": "success"}
+    # Same rule as both apps: locked by the phase OR already bought this window
+    team = store.read(supabase.table("teams").select("last_action_round").eq("code", req.team_code).single(), fresh=True).data
+    locked = not get_phase().can_trade(req.team_code) or game_phase.has_bought(team['last_action_round'])
+
+    if locked:
+        game_phase.unlock_team(req.team_code)
+        store.write(supabase.table("teams").update({"last_action_round": 0}).eq("code", req.team_code))
+    else:
+        game_phase.lock_team(req.team_code)
+    save_phase()
+    return {"status": "success", "locked": not locked}
+
+@app.get("/game-phase")
+def read_game_phase():
+    """Current phase plus per-team overrides."""
+    return json.loads(get_phase().dump())
 
 @app.post("/admin/broadcast")
 def send_broadcast(req: BroadcastRequest):
-    supabase.table("config").update({"value": req.message}).eq("key", "system_message").execute()
+    store.write(supabase.table("config").update({"value": req.message}).eq("key", "system_message"))
     return {"status": "success"}
 
 @app.post("/admin/reset-game")
 def reset_game_full():
+    global pending_round
+    pending_round = None
     print("♻️ FACTORY RESET")
     # 1. Reset Teams (Clear Cash, Debt, AND Assets)
-    supabase.table("teams").update({
+    store.write(supabase.table("teams").update({
         "cash": 1500, 
         "carbon_debt": 0, 
         "inventory_choice": "None", 
         "last_action_round": 0,
         "assets": ""  # <--- FIX: Clear assets string
-    }).neq("code", "placeholder").execute()
+    }).neq("code", "placeholder"))
     
     # 2. Reset Config
-    supabase.table("config").update({"value": "1"}).eq("key", "current_round").execute()
-    supabase.table("config").update({"value": "None"}).eq("key", "active_event").execute()
-    supabase.table("config").update({"value": "Welcome!"}).eq("key", "system_message").execute()
+    store.write(supabase.table("config").update({"value": "1"}).eq("key", "current_round"))
+    store.write(supabase.table("config").update({"value": "None"}).eq("key", "active_event"))
+    store.write(supabase.table("config").update({"value": "Welcome!"}).eq("key", "system_message"))
+    get_phase().reset()
+    save_phase()
     
     # 3. Clear Claim Codes (Optional: Delete all created LOBBY codes)
     # Note: Supabase-py doesn't support 'truncate', so we delete where ID is not null
-    supabase.table("claim_codes").delete().neq("code", "INVALID_CODE").execute()
+    store.write(supabase.table("claim_codes").delete().neq("code", "INVALID_CODE"))
 
     # 4. CLEAR LOGS (The Fix)
     # Deletes everything in the log table
-    supabase.table("master_log").delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
+    store.write(supabase.table("master_log").delete().neq("id", "00000000-0000-0000-0000-000000000000"))
     
     return {"status": "success"}
 # --- NEW: AUCTION CODE SYSTEM ---
@@ -389,9 +493,10 @@ AUCTION_ITEMS = {
 def redeem_code(req: RedeemRequest):
     secret = req.secret_code.upper()
     team_code = req.team_code
+    require_trading(team_code)
 
     # 1. CHECK DATABASE (Secure Codes)
-    db_code = supabase.table("claim_codes").select("*").eq("code", secret).maybe_single().execute()
+    db_code = store.read(supabase.table("claim_codes").select("*").eq("code", secret).maybe_single(), fresh=True)
 
     item_to_buy = None
 
@@ -423,7 +528,7 @@ def redeem_code(req: RedeemRequest):
             raise HTTPException(status_code=400, detail="Invalid Code")
 
     # 3. EXECUTE PURCHASE (Common Logic)
-    res = supabase.table("teams").select("*").eq("code", team_code).single().execute()
+    res = store.read(supabase.table("teams").select("*").eq("code", team_code).single(), fresh=True)
     team = res.data
 
     if team['cash'] < item_to_buy['cost']:
@@ -437,19 +542,19 @@ def redeem_code(req: RedeemRequest):
     new_assets = f"{current_assets},{item_to_buy['name']}".strip(",")
 
     # Update Team
-    supabase.table("teams").update({
+    store.write(supabase.table("teams").update({
         "cash": team['cash'] - item_to_buy['cost'],
         "assets": new_assets,
         "carbon_debt": max(0, team['carbon_debt'] + item_to_buy['debt_effect']) 
-    }).eq("code", team_code).execute()
+    }).eq("code", team_code), idempotent=False)
 
     # 4. MARK AS USED (If it was a DB code)
     if item_to_buy.get("is_db_code"):
-        supabase.table("claim_codes").update({"is_used": True}).eq("code", secret).execute()
+        store.write(supabase.table("claim_codes").update({"is_used": True}).eq("code", secret), idempotent=False)
 
      # --- NEW: LOGGING ---
     try:
-        current_round = supabase.table("config").select("value").eq("key", "current_round").single().execute().data['value']
+        current_round = store.read(supabase.table("config").select("value").eq("key", "current_round").single()).data['value']
         log_transaction(team_code, int(current_round), "REDEEM_CODE", f"Redeemed {item_to_buy['name']}")
     except: pass
     # --------------------   
@@ -459,7 +564,7 @@ def redeem_code(req: RedeemRequest):
 def update_team_stats(req: TeamStatUpdate):
     """Manually modifies a team's stats."""
     # 1. Get current stats
-    res = supabase.table("teams").select("*").eq("code", req.team_code).single().execute()
+    res = store.read(supabase.table("teams").select("*").eq("code", req.team_code).single(), fresh=True)
     team = res.data
     
     if not team:
@@ -470,14 +575,14 @@ def update_team_stats(req: TeamStatUpdate):
     new_debt = max(0, team['carbon_debt'] + req.debt_change) # Prevent negative debt
 
     # 3. Save to DB
-    supabase.table("teams").update({
+    store.write(supabase.table("teams").update({
         "cash": new_cash,
         "carbon_debt": new_debt
-    }).eq("code", req.team_code).execute()
+    }).eq("code", req.team_code), idempotent=False)
 
     # --- NEW: LOGGING ---
     try:
-        current_round = supabase.table("config").select("value").eq("key", "current_round").single().execute().data['value']
+        current_round = store.read(supabase.table("config").select("value").eq("key", "current_round").single()).data['value']
         log_transaction(req.team_code, int(current_round), "ADMIN_EDIT", f"Manual: Cash {req.cash_change}, Debt {req.debt_change}")
     except: pass # Don't crash if logging fails
     # --------------------
@@ -486,54 +591,112 @@ def update_team_stats(req: TeamStatUpdate):
 @app.post("/admin/update-team-info")
 def update_team_info(req: TeamInfoUpdate):
     """Updates team credentials."""
-    supabase.table("teams").update({
+    store.write(supabase.table("teams").update({
         "username": req.username,
         "password": req.password,
         "members": req.members
-    }).eq("code", req.team_code).execute()
+    }).eq("code", req.team_code))
     return {"status": "success"}
-@app.post("/admin/grant-auction-item")
-def grant_auction_item(req: AuctionGrantRequest):
-    """Admin manually gives an item at a specific auction price."""
-    # 1. Get current team data
-    res = supabase.table("teams").select("*").eq("code", req.team_code).single().execute()
-    team = res.data
-    
-    if not team:
-        return {"status": "error", "message": "Team not found"}
+# --- LIVE AUCTION (Sealed Bids) ---
+
+@app.post("/admin/auction/open")
+def open_auction_lot(req: OpenLotRequest):
+    """Puts a catalog auction item (or an AUCTION_ITEMS card) up for bidding."""
+    if req.item_id:
+        res = store.read(supabase.table("catalog").select("*").eq("id", req.item_id).maybe_single())
+        if not res or not res.data or res.data['category'] != 'auction':
+            raise HTTPException(status_code=400, detail="Not an auction item")
+        name, debt_effect = res.data['name'], res.data['debt_effect']
+    elif req.secret_code and req.secret_code.upper() in AUCTION_ITEMS:
+        card = AUCTION_ITEMS[req.secret_code.upper()]
+        name, debt_effect = card['name'], card['debt_effect']
+    else:
+        raise HTTPException(status_code=400, detail="Pick a catalog item or card code")
 
-    # 2. Update Asset String
-    current_assets = team.get('assets') or ""
-    new_assets = f"{current_assets},{req.item_name}".strip(",")
+    # One read up front so bids can be sanity-checked without hitting `teams`
+    teams = store.read(supabase.table("teams").select("code, cash")).data
+    cash_snapshot = {t['code']: t['cash'] for t in teams}
 
-    # 3. Deduct Cash & Reduce Debt immediately
-    supabase.table("teams").update({
-        "cash": team['cash'] - req.price,  # Deduct the BID PRICE, not default
-        "carbon_debt": max(0, team['carbon_debt'] + req.debt_reduction),
-        "assets": new_assets
-    }).eq("code", req.team_code).execute()
+    lot = auction.open_lot(name, debt_effect, req.reserve, cash_snapshot)
+    print(f"🔨 LOT {lot.lot_id} OPEN: {name}")
+    return {"status": "success", "lot": lot.summary()}
 
-    # --- NEW: LOGGING ---
+@app.get("/auction/lots")
+def list_auction_lots():
+    """Open lots for the student app (bids stay sealed)."""
+    return [lot.summary() for lot in auction.open_lots()]
+
+@app.post("/auction/bid")
+def place_bid(req: BidRequest):
+    """Records a sealed bid in memory. No database writes."""
+    require_trading(req.team_code)
     try:
-        current_round = supabase.table("config").select("value").eq("key", "current_round").single().execute().data['value']
-        log_transaction(req.team_code, int(current_round), "AUCTION_WIN", f"Won {req.item_name} for ${req.price}")
-    except: pass
-    # --------------------
-    
-    return {"status": "success", "deducted": req.price} 
+        auction.get_lot(req.lot_id).place_bid(req.team_code, req.amount)
+    except auction.AuctionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "lot_id": req.lot_id, "amount": req.amount}
+
+def send_settlement(settlement):
+    """Writes one batch of auction winners (single upsert), then logs it."""
+    # Single upsert = single statement, so either every winner pays or none do
+    if settlement['rows']:
+        store.write(supabase.table("teams").upsert(settlement['rows'], on_conflict="code"), idempotent=False)
+    auction.forget_lots(settlement['lots'])
+
+    wins = [r for r in settlement['results'] if r['winner']]
+    if wins:
+        try:
+            current_round = int(store.read(supabase.table("config").select("value").eq("key", "current_round").single()).data['value'])
+            store.write(supabase.table("master_log").insert([{
+                "team_id": r['winner'],
+                "round": current_round,
+                "action_type": "AUCTION_WIN",
+                "details": {"msg": f"Won {r['item']} for ${r['price']}"}
+            } for r in wins]), idempotent=False, queue=True)
+        except Exception as e:
+            print(f"⚠️ Log Error: {e}")
+    return settlement['results']
+
+@app.post("/admin/auction/close")
+def close_auction(req: CloseLotsRequest):
+    """Closes lots and settles every winner in one batch."""
+    try:
+        lots = auction.close_lots(req.lot_ids)
+    except auction.AuctionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not lots:
+        return {"status": "success", "results": []}
+
+    # A batch whose upsert failed may still have committed (timeout after the
+    # write), so it is resent with the same absolute rows, never re-priced
+    earlier, unpriced = auction.split_settled(lots)
+    results = []
+    try:
+        for settlement in earlier:
+            results += send_settlement(settlement)
+        if unpriced:
+            bidders = list({code for lot in unpriced for code in lot.bids})
+            teams = store.read(supabase.table("teams").select("code, cash, carbon_debt, assets").in_("code", bidders), fresh=True).data if bidders else []
+            rows, lot_results = auction.pick_winners(unpriced, teams)
+            results += send_settlement(auction.attach_settlement(unpriced, rows, lot_results))
+    except Exception:
+        auction.release_lots([lot for lot in lots if lot.lot_id in auction.LOTS])
+        raise
+
+    return {"status": "success", "results": results}
     
 @app.post("/admin/create-code")
 def create_claim_code(req: CreateCodeRequest):
     """Generates a secure, one-time code for a specific team."""
     try:
-        supabase.table("claim_codes").insert({
+        store.write(supabase.table("claim_codes").insert({
             "code": req.code.upper(),
             "team_id": req.team_id,
             "item_name": req.item_name,
             "price": req.price,
             "debt_reduction": req.debt_reduction,
             "is_used": False
-        }).execute()
+        }), idempotent=False)
         return {"status": "success"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -543,18 +706,18 @@ def create_claim_code(req: CreateCodeRequest):
 @app.get("/catalog")
 def get_catalog():
     """Fetches all buyable items for the Frontend."""
-    return supabase.table("catalog").select("*").execute().data
+    return store.read(supabase.table("catalog").select("*")).data
 
 @app.post("/admin/add-catalog-item")
 def add_catalog_item(req: CatalogItem):
     """Admin adds a new button to the game."""
-    supabase.table("catalog").insert(req.dict()).execute()
+    store.write(supabase.table("catalog").insert(req.dict()), idempotent=False)
     return {"status": "success"}
 
 @app.post("/admin/revoke-asset")
 def revoke_asset(req: RevokeRequest):
     """Removes a specific item from a team's asset list."""
-    res = supabase.table("teams").select("assets").eq("code", req.team_code).single().execute()
+    res = store.read(supabase.table("teams").select("assets").eq("code", req.team_code).single(), fresh=True)
     if not res.data: return {"status": "error"}
     
     # Logic: Convert "A,B,C" -> List -> Remove B -> "A,C"
@@ -564,12 +727,12 @@ def revoke_asset(req: RevokeRequest):
     
     new_assets = ",".join(current_list)
     
-    supabase.table("teams").update({"assets": new_assets}).eq("code", req.team_code).execute()
+    store.write(supabase.table("teams").update({"assets": new_assets}).eq("code", req.team_code), idempotent=False)
     return {"status": "success"}
 @app.post("/admin/delete-catalog-item")
 def delete_catalog_item(req: DeleteCatalogRequest):
     """Permanently removes an item from the shop."""
-    supabase.table("catalog").delete().eq("id", req.item_id).execute()
+    store.write(supabase.table("catalog").delete().eq("id", req.item_id))
     return {"status": "success"}
 @app.post("/admin/reset-single-team")
 def reset_single_team(req: ManageTeamRequest):
@@ -577,26 +740,27 @@ def reset_single_team(req: ManageTeamRequest):
     print(f"♻️ RESETTING TEAM: {req.team_code}")
     
     # Reset values to defaults: Cash 1500, Debt 0, No Inventory, No Assets
-    supabase.table("teams").update({
+    store.write(supabase.table("teams").update({
         "cash": 1500,
         "carbon_debt": 0,
         "inventory_choice": "None",
         "last_action_round": 0,
         "assets": "" # Clears their inventory
-    }).eq("code", req.team_code).execute()
+    }).eq("code", req.team_code))
     
     return {"status": "success", "message": f"{req.team_code} reset successfully"}
 @app.get("/admin/logs")
 def get_master_logs():
     """Fetches the history of all transactions."""
     # Fetch last 100 logs, ordered by newest first
-    return supabase.table("master_log").select("*").order("timestamp", desc=True).limit(100).execute().data
+    return store.read(supabase.table("master_log").select("*").order("timestamp", desc=True).limit(100)).data
 @app.post("/buy-supplier")
 def buy_supplier(req: BuySupplierRequest):
     """Handle purchase and logging automatically on the server."""
+    require_trading(req.team_code)
 
     # 1. Get Team Data
-    res = supabase.table("teams").select("*").eq("code", req.team_code).single().execute()
+    res = store.read(supabase.table("teams").select("*").eq("code", req.team_code).single(), fresh=True)
     team = res.data
 
     if not team:
@@ -610,16 +774,16 @@ def buy_supplier(req: BuySupplierRequest):
     new_debt = max(0, team['carbon_debt'] + req.debt_effect)
 
     # 3. Get Current Round (for the log)
-    config_res = supabase.table("config").select("value").eq("key", "current_round").single().execute()
+    config_res = store.read(supabase.table("config").select("value").eq("key", "current_round").single())
     current_round = int(config_res.data['value'])
 
     # 4. Perform the Update (Instant Deduction)
-    supabase.table("teams").update({
+    store.write(supabase.table("teams").update({
         "inventory_choice": req.item_name,
         "cash": new_cash,
         "carbon_debt": new_debt,
-        "last_action_round": current_round
-    }).eq("code", req.team_code).execute()
+        "last_action_round": game_phase.window()  # bought in this trading window
+    }).eq("code", req.team_code), idempotent=False)
 
     # 5. AUTOMATIC LOGGING (Server-Side)
     log_transaction(req.team_code, current_round, "BUY_SUPPLIER", f"Bought {req.item_name} for ${req.cost}")
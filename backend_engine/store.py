@@ -0,0 +1,213 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# --- RESILIENT STORE ACCESS ---
+# Every Supabase call in main.py goes through read()/write() here instead of
+# calling .execute() directly. Flaky venue Wi-Fi + the ngrok tunnel mean calls
+# time out or drop, so this layer:
+#   1. retries idempotent calls with jittered backoff
+#   2. counts failures in a circuit breaker
+#   3. when the breaker trips, goes DEGRADED: reads come from the last good
+#      result, plain overwrites are queued and replayed in order once the
+#      store is back. Balance changes are refused (503) rather than queued.
+
+TIMEOUT = float(os.environ.get("STORE_TIMEOUT", 5))
+RETRIES = int(os.environ.get("STORE_RETRIES", 3))
+BACKOFF = float(os.environ.get("STORE_BACKOFF", 0.2))
+FAIL_THRESHOLD = int(os.environ.get("STORE_FAIL_THRESHOLD", 5))
+COOLDOWN = float(os.environ.get("STORE_COOLDOWN", 15))
+
+# Fault injection for rehearsing a bad network on a local stand-in, e.g.
+#   STORE_FAULT_DROP=0.3 STORE_FAULT_LATENCY=2 python -m uvicorn main:app
+FAULT_DROP = float(os.environ.get("STORE_FAULT_DROP", 0))
+FAULT_LATENCY = float(os.environ.get("STORE_FAULT_LATENCY", 0))
+
+CLOSED = "closed"        # healthy
+OPEN = "open"            # degraded: cached reads, queued writes
+HALF_OPEN = "half_open"  # cooldown over, next call is a probe
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_state = CLOSED
+_failures = 0
+_opened_at = 0.0
+_cache = {}
+_pending = deque()
+
+
+class StoreUnavailable(Exception):
+    """The store is down and there is nothing cached to answer with."""
+
+
+class Queued:
+    """Stand-in result for a write that was queued while degraded."""
+    data = None
+    queued = True
+
+
+class InjectedFault(Exception):
+    """A drop simulated by the fault injector."""
+
+
+try:
+    from httpx import TransportError  # timeouts, refused/dropped connections
+except ImportError:  # httpx ships with supabase; only missing in bare test envs
+    TransportError = ConnectionError
+
+# Only these mean "the network is bad". Anything else (PostgREST APIError for
+# 0 rows, duplicate keys, bad filters) is the caller's problem: raised at once,
+# never retried and never counted against the breaker.
+TRANSPORT_ERRORS = (TransportError, ConnectionError, TimeoutError, InjectedFault)
+
+
+def _inject_faults():
+    if FAULT_LATENCY:
+        time.sleep(random.uniform(0, FAULT_LATENCY))
+    if FAULT_DROP and random.random() < FAULT_DROP:
+        raise InjectedFault("Simulated connection drop")
+
+
+def _cache_key(query):
+    path = getattr(query, "path", None)
+    if path is None:
+        return None
+    return f"{path}?{getattr(query, 'params', '')}"
+
+
+# --- CIRCUIT BREAKER ---
+
+def status():
+    return {"state": _state, "failures": _failures, "queued_writes": len(_pending)}
+
+
+def is_degraded():
+    global _state
+    with _lock:
+        if _state == OPEN and time.monotonic() - _opened_at >= COOLDOWN:
+            _state = HALF_OPEN
+        return _state == OPEN
+
+
+def _record_success():
+    global _state, _failures
+    with _lock:
+        recovered = _state != CLOSED
+        _state = CLOSED
+        _failures = 0
+    if recovered:
+        print("✅ Store recovered")
+        _flush_pending()
+
+
+def _record_failure(e):
+    global _state, _failures, _opened_at
+    with _lock:
+        _failures += 1
+        if _state == HALF_OPEN or _failures >= FAIL_THRESHOLD:
+            if _state != OPEN:
+                print(f"⚠️ Store degraded: {e}")
+            _state = OPEN
+            _opened_at = time.monotonic()
+
+
+def _flush_pending():
+    """Replays queued writes in order. Stops (and re-trips) on the first failure."""
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        while _pending:
+            query = _pending[0]
+            try:
+                _inject_faults()
+                query.execute()
+            except TRANSPORT_ERRORS as e:
+                _record_failure(e)
+                return
+            except Exception as e:
+                # Replaying won't fix a rejected write; drop it so the queue moves on
+                print(f"⚠️ Dropped queued write: {e}")
+            _pending.popleft()
+    finally:
+        _flush_lock.release()
+
+
+# --- CALLS ---
+
+def _execute(query, attempts):
+    last_error = None
+    for attempt in range(attempts):
+        if attempt:
+            # Full jitter: spread retries out so clients don't stampede together
+            time.sleep(random.uniform(0, BACKOFF * 2 ** attempt))
+        try:
+            _inject_faults()
+            result = query.execute()
+        except TRANSPORT_ERRORS as e:
+            last_error = e
+            _record_failure(e)
+            if is_degraded():
+                break
+            continue
+        _record_success()
+        return result
+    raise StoreUnavailable(str(last_error))
+
+
+def read(query, fresh=False):
+    """
+    Runs a select, falling back to the last good result while degraded.
+    fresh=True skips the fallback, for reads that feed a balance update. It
+    also refuses while writes are still queued: the row it would read may be
+    about to change.
+    """
+    key = _cache_key(query)
+    if fresh:
+        if _pending and not is_degraded():
+            _flush_pending()
+        if _pending:
+            raise StoreUnavailable("Store catching up on queued writes, try again shortly")
+    if not is_degraded():
+        try:
+            result = _execute(query, RETRIES)
+            if key:
+                _cache[key] = result
+            return result
+        except StoreUnavailable:
+            if fresh:
+                raise
+    if key in _cache and not fresh:
+        return _cache[key]
+    raise StoreUnavailable("Store offline and no cached copy")
+
+
+def write(query, idempotent=True, queue=None):
+    """
+    idempotent=True: plain overwrites (config, credentials, resets). Retried,
+    and queued while degraded. Queued writes keep their order.
+    idempotent=False: inserts and read-modify-write balance updates. Tried
+    once and never queued, so a failure surfaces as a 503 right away.
+    queue=True lets a non-idempotent write (log inserts) wait in the queue
+    while degraded. It is still never queued after a failed attempt, because
+    that attempt may have gone through.
+    """
+    if queue is None:
+        queue = idempotent
+    if _pending and not is_degraded():
+        _flush_pending()
+    if is_degraded() or _pending:
+        if not queue:
+            raise StoreUnavailable("Store offline, try again shortly")
+        _pending.append(query)
+        return Queued()
+    try:
+        return _execute(query, RETRIES if idempotent else 1)
+    except StoreUnavailable:
+        if not idempotent:
+            raise
+        # Safe to replay later: running it twice has the same effect as once
+        _pending.append(query)
+        return Queued()
+
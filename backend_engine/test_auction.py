@@ -0,0 +1,74 @@
+import pytest
+
+import auction
+
+
+@pytest.fixture(autouse=True)
+def clean_lots():
+    auction.LOTS.clear()
+    yield
+    auction.LOTS.clear()
+
+
+def team(code, cash, debt=0, assets=""):
+    return {"code": code, "cash": cash, "carbon_debt": debt, "assets": assets}
+
+
+def test_highest_bid_wins_and_tie_goes_to_earlier_bid():
+    lot = auction.open_lot("Scrubber", -10, 0, {"A": 1000, "B": 1000, "C": 1000})
+    lot.place_bid("A", 300)
+    lot.place_bid("B", 500)
+    lot.place_bid("C", 500)
+
+    rows, results = auction.pick_winners([lot], [team("A", 1000), team("B", 1000), team("C", 1000)])
+    assert results[0]["winner"] == "B"
+    assert rows == [{"code": "B", "cash": 500, "carbon_debt": 0, "assets": "Scrubber"}]
+
+
+def test_falls_back_to_next_bidder_who_can_pay():
+    lot = auction.open_lot("Solar", -20, 0, {"A": 1000, "B": 1000})
+    lot.place_bid("A", 900)
+    lot.place_bid("B", 400)
+
+    # A spent money elsewhere after the lot opened
+    rows, results = auction.pick_winners([lot], [team("A", 100), team("B", 1000)])
+    assert results[0] == {"lot_id": lot.lot_id, "item": "Solar", "winner": "B", "price": 400}
+    assert [r["code"] for r in rows] == ["B"]
+
+
+def test_cash_is_tracked_across_lots():
+    first = auction.open_lot("Forest", -10, 0, {"A": 1000, "B": 1000})
+    second = auction.open_lot("Solar", -20, 0, {"A": 1000, "B": 1000})
+    first.place_bid("A", 700)
+    second.place_bid("A", 600)
+    second.place_bid("B", 200)
+
+    rows, results = auction.pick_winners([first, second], [team("A", 1000, debt=25), team("B", 1000)])
+    assert [r["winner"] for r in results] == ["A", "B"]
+    by_code = {r["code"]: r for r in rows}
+    assert by_code["A"] == {"code": "A", "cash": 300, "carbon_debt": 15, "assets": "Forest"}
+    assert by_code["B"]["cash"] == 800
+
+
+def test_bids_are_validated():
+    lot = auction.open_lot("Solar", -20, 100, {"A": 500})
+    for code, amount in [("A", 50), ("A", 600), ("Z", 200)]:
+        with pytest.raises(auction.AuctionError):
+            lot.place_bid(code, amount)
+    auction.close_lots()
+    with pytest.raises(auction.AuctionError):
+        lot.place_bid("A", 200)
+
+
+def test_close_never_claims_a_lot_twice():
+    lot = auction.open_lot("Solar", -20, 0, {"A": 500})
+    assert auction.close_lots() == [lot]
+    assert auction.close_lots() == []
+    assert auction.open_lots() == []
+
+    # Failed settlement: released for a retry, with the computed batch pinned
+    auction.attach_settlement([lot], [{"code": "A", "cash": 0}], [])
+    auction.release_lots([lot])
+    assert auction.close_lots([lot.lot_id]) == [lot]
+    earlier, unpriced = auction.split_settled([lot])
+    assert earlier == [lot.settlement] and unpriced == []
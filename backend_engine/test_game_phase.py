@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import game_phase as g
+
+
+@pytest.fixture(autouse=True)
+def fresh_phase():
+    g.load(None)
+
+
+def test_allowed_transitions():
+    g.move_to(g.LOCKED)
+    g.move_to(g.SETTLING)
+    g.move_to(g.RESULTS)
+    g.move_to(g.SETTLING)  # re-running a round
+    g.move_to(g.RESULTS)
+    g.move_to(g.OPEN)
+    assert g.current() == g.OPEN
+
+
+def test_settling_can_be_left_without_results():
+    for target in (g.OPEN, g.LOCKED):
+        g.load(None)
+        g.move_to(g.SETTLING)
+        g.move_to(target)
+        assert g.current() == target
+
+
+def test_rejected_transition_keeps_phase():
+    g.move_to(g.SETTLING)
+    g.move_to(g.RESULTS)
+    g.move_to(g.LOCKED)
+    with pytest.raises(g.PhaseError):
+        g.move_to(g.RESULTS)
+    assert g.current() == g.LOCKED
+
+
+def test_lock_override_beats_open_phase():
+    g.lock_team("T1")
+    assert not g.can_trade("T1")
+    assert g.can_trade("T2")
+
+
+def test_unlock_override_only_lifts_locked():
+    g.move_to(g.LOCKED)
+    g.unlock_team("T1")
+    assert g.can_trade("T1") and not g.can_trade("T2")
+    g.move_to(g.SETTLING)
+    assert not g.can_trade("T1")
+    g.move_to(g.RESULTS)
+    assert not g.can_trade("T1")
+
+
+def test_lock_all_clears_unlock_overrides():
+    g.move_to(g.LOCKED)
+    g.unlock_team("T1")
+    g.move_to(g.LOCKED, clear_overrides=True)
+    assert not g.can_trade("T1")
+
+
+def test_new_window_frees_earlier_purchases():
+    g.load(None, default_window=3)
+    assert g.has_bought(3) and not g.has_bought(2) and not g.has_bought(None)
+    g.move_to(g.OPEN, clear_overrides=True, new_window=True)
+    assert not g.has_bought(3) and g.has_bought(4)
+
+
+def test_dump_round_trips_and_reset():
+    g.move_to(g.LOCKED)
+    g.unlock_team("T1")
+    g.lock_team("T2")
+    saved = g.dump()
+    g.load(saved)
+    assert json.loads(g.dump()) == {"phase": g.LOCKED, "locked": ["T2"], "unlocked": ["T1"], "window": 1}
+
+    g.reset()
+    assert json.loads(g.dump()) == {"phase": g.OPEN, "locked": [], "unlocked": [], "window": 1}
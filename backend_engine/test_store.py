@@ -0,0 +1,202 @@
+import time
+
+import pytest
+
+import store
+
+# --- FAULT-INJECTION HARNESS ---
+# FakeStore is a local stand-in for Supabase: an in-memory table behind a
+# "network" we can drop or slow down on demand. FakeQuery mimics the
+# postgrest builder just enough for store.read()/store.write().
+
+
+class FakeStore:
+    def __init__(self, timeout=0.05):
+        self.rows = {"A": {"cash": 1500}}
+        self.timeout = timeout
+        self.drops = 0      # next N calls fail
+        self.latency = 0.0  # seconds added to every call
+        self.applied = []   # writes that actually landed, in order
+
+    def call(self):
+        if self.latency:
+            if self.latency > self.timeout:
+                time.sleep(self.timeout)
+                raise TimeoutError("Simulated latency spike")
+            time.sleep(self.latency)
+        if self.drops:
+            self.drops -= 1
+            raise ConnectionError("Simulated drop")
+
+
+class Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class APIError(Exception):
+    """Like postgrest's APIError: the store answered, with a refusal."""
+
+
+class RejectedQuery:
+    path = "teams"
+    params = "code=missing"
+
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        raise APIError("JSON object requested, multiple (or no) rows returned")
+
+
+class FakeQuery:
+    def __init__(self, db, code, cash=None, tag=None):
+        self.db = db
+        self.code = code
+        self.cash = cash
+        self.tag = tag
+        self.path = "teams"
+        self.params = f"code={code}"
+
+    def execute(self):
+        self.db.call()
+        if self.cash is None:
+            return Result(dict(self.db.rows[self.code]))
+        self.db.rows[self.code]["cash"] = self.cash
+        self.db.applied.append(self.tag)
+        return Result(None)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(store, "BACKOFF", 0)
+    monkeypatch.setattr(store, "RETRIES", 3)
+    monkeypatch.setattr(store, "FAIL_THRESHOLD", 3)
+    monkeypatch.setattr(store, "COOLDOWN", 0.05)
+    monkeypatch.setattr(store, "FAULT_DROP", 0)
+    monkeypatch.setattr(store, "FAULT_LATENCY", 0)
+    monkeypatch.setattr(store, "_state", store.CLOSED)
+    monkeypatch.setattr(store, "_failures", 0)
+    monkeypatch.setattr(store, "_cache", {})
+    monkeypatch.setattr(store, "_pending", store.deque())
+    return FakeStore()
+
+
+def read(db, fresh=False):
+    return store.read(FakeQuery(db, "A"), fresh=fresh).data
+
+
+def test_transient_drop_is_retried(db):
+    db.drops = 2
+    assert read(db)["cash"] == 1500
+    assert store.status()["state"] == store.CLOSED
+
+
+def test_breaker_trips_and_serves_cached_reads(db):
+    read(db)
+    db.drops = 100
+    assert read(db)["cash"] == 1500  # from cache
+    assert store.status()["state"] == store.OPEN
+    with pytest.raises(store.StoreUnavailable):
+        read(db, fresh=True)
+
+
+def test_latency_spike_counts_as_failure(db):
+    db.latency = 1
+    with pytest.raises(store.StoreUnavailable):
+        read(db)
+    assert store.status()["state"] == store.OPEN
+
+
+def test_degraded_queues_overwrites_but_refuses_balance_writes(db):
+    db.drops = 100
+    with pytest.raises(store.StoreUnavailable):
+        read(db)
+    assert store.write(FakeQuery(db, "A", 1000, "reset")).queued
+    with pytest.raises(store.StoreUnavailable):
+        store.write(FakeQuery(db, "A", 900, "buy"), idempotent=False)
+    assert store.status()["queued_writes"] == 1
+
+
+def test_half_open_recovery_replays_in_order(db):
+    db.drops = 100
+    with pytest.raises(store.StoreUnavailable):
+        read(db)
+    for i in range(3):
+        store.write(FakeQuery(db, "A", 1000 + i, f"w{i}"))
+
+    db.drops = 0
+    time.sleep(0.06)  # cooldown -> half-open, next call is a probe
+    assert read(db)["cash"] == 1500
+    assert db.applied == ["w0", "w1", "w2"]
+    assert db.rows["A"]["cash"] == 1002
+    assert store.status() == {"state": store.CLOSED, "failures": 0, "queued_writes": 0}
+
+
+def test_failed_probe_reopens_breaker(db):
+    db.drops = 100
+    with pytest.raises(store.StoreUnavailable):
+        read(db)
+    time.sleep(0.06)
+    with pytest.raises(store.StoreUnavailable):
+        read(db)
+    assert store.status()["state"] == store.OPEN
+
+
+def test_fresh_read_never_sees_stale_balance(db, monkeypatch):
+    # A plain overwrite fails below the breaker threshold and gets queued
+    monkeypatch.setattr(store, "FAIL_THRESHOLD", 10)
+    db.drops = 3
+    store.write(FakeQuery(db, "A", 1000, "reset"))
+    assert store.status() == {"state": store.CLOSED, "failures": 3, "queued_writes": 1}
+
+    # Buy A: its read must not go ahead while the queue still holds that row
+    db.drops = 1
+    with pytest.raises(store.StoreUnavailable):
+        read(db, fresh=True)
+    assert db.rows["A"]["cash"] == 1500
+
+    # Once the queue drains, the fresh read sees the replayed value
+    assert read(db, fresh=True)["cash"] == 1000
+    store.write(FakeQuery(db, "A", 900, "buy A"), idempotent=False)
+    assert read(db, fresh=True)["cash"] == 900
+    assert db.applied == ["reset", "buy A"]
+
+
+def test_failed_balance_write_is_not_queued(db):
+    db.drops = 1
+    with pytest.raises(store.StoreUnavailable):
+        store.write(FakeQuery(db, "A", 900, "buy"), idempotent=False)
+    assert store.status()["queued_writes"] == 0
+    assert db.rows["A"]["cash"] == 1500
+
+
+def test_fault_injector_drops(db, monkeypatch):
+    monkeypatch.setattr(store, "FAULT_DROP", 1)
+    with pytest.raises(store.StoreUnavailable):
+        read(db)
+
+
+def test_application_errors_skip_retry_and_breaker(db):
+    for _ in range(5):
+        query = RejectedQuery()
+        with pytest.raises(APIError):
+            store.read(query)
+        assert query.calls == 1
+    assert store.status() == {"state": store.CLOSED, "failures": 0, "queued_writes": 0}
+
+
+def test_rejected_queued_write_is_dropped_not_replayed_forever(db):
+    db.drops = 100
+    with pytest.raises(store.StoreUnavailable):
+        read(db)
+    store.write(RejectedQuery())
+    store.write(FakeQuery(db, "A", 1000, "after"))
+
+    db.drops = 0
+    time.sleep(0.06)
+    read(db)  # probe succeeds, queue drains
+    assert db.applied == ["after"]
+    assert db.rows["A"]["cash"] == 1000
+    assert store.status()["queued_writes"] == 0
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { supabase } from './supabaseClient'
-import { ShoppingCart, Leaf, TrendingUp, CheckCircle, Lock, DollarSign, Megaphone, Activity, Ticket } from 'lucide-react'
+import { ShoppingCart, Leaf, TrendingUp, CheckCircle, Lock, DollarSign, Megaphone, Activity, Ticket, Gavel } from 'lucide-react'
 import axios from 'axios'
 // --- PASTE THIS LINE TO FIX VERCEL ---
 axios.defaults.headers.common['ngrok-skip-browser-warning'] = 'true';
@@ -75,6 +75,8 @@ function Dashboard({ teamId, onLogout }) {
   const [loading, setLoading] = useState(false)
   const [redeemCode, setRedeemCode] = useState("")
   const [catalog, setCatalog] = useState([]) // Stores dynamic items
+  const [lots, setLots] = useState([]) // Live auction lots
+  const [bids, setBids] = useState({}) // lot_id -> amount typed / placed
 
   const fetchData = async () => {
     // 1. Try to find the team
@@ -107,6 +109,8 @@ function Dashboard({ teamId, onLogout }) {
         const ENGINE_URL = import.meta.env.VITE_ENGINE_URL || "http://127.0.0.1:8000"
         const catRes = await axios.get(`${ENGINE_URL}/catalog`)
         setCatalog(catRes.data)
+        const lotRes = await axios.get(`${ENGINE_URL}/auction/lots`)
+        setLots(lotRes.data)
     } catch(e) { console.error("Catalog load failed") }
     setConfig(configObj)
   }
@@ -162,6 +166,16 @@ function Dashboard({ teamId, onLogout }) {
       setLoading(false)
   }
 
+  const placeBid = async (lot) => {
+      const amount = parseInt(bids[lot.lot_id])
+      if(!amount) return;
+      try {
+          const ENGINE_URL = import.meta.env.VITE_ENGINE_URL || "http://127.0.0.1:8000"
+          await axios.post(`${ENGINE_URL}/auction/bid`, { team_code: teamId, lot_id: lot.lot_id, amount })
+          alert(`✅ Sealed bid of $${amount} placed on ${lot.name}`)
+      } catch (err) { alert(err.response?.data?.detail || "Bid failed") }
+  }
+
   // --- HELPER TO FIX THE CRASH ---
   // This converts whatever the database sends (Array or String) into a clean List
   const getAssetList = () => {
@@ -173,7 +187,12 @@ function Dashboard({ teamId, onLogout }) {
   if (!team) return <div className="p-10 text-center animate-pulse text-emerald-400">Connecting to HQ...</div>
 
   const currentRound = parseInt(config.current_round || 1)
-  const isLocked = team.last_action_round >= currentRound
+  // Phase record is pushed as a single config change. A lock override always wins,
+  // an unlock override only lifts LOCKED; "window" marks who already bought.
+  let phase = { phase: 'OPEN', locked: [], unlocked: [] }
+  try { if (config.game_phase) phase = JSON.parse(config.game_phase) } catch (e) {}
+  const phaseOpen = phase.locked.includes(teamId) ? false : phase.phase === 'OPEN' ? true : phase.phase === 'LOCKED' && phase.unlocked.includes(teamId)
+  const isLocked = !phaseOpen || team.last_action_round >= (phase.window ?? currentRound)
   const score = (team.cash * 0.6) + ((100 - team.carbon_debt) * 10)
   const eventColor = config.active_event !== 'None' ? 'text-yellow-400' : 'text-slate-500';
 
@@ -219,6 +238,31 @@ function Dashboard({ teamId, onLogout }) {
             </div>
         </div>
 
+        {lots.length > 0 && (
+            <div className="bg-slate-900 p-5 rounded-xl border border-purple-800 mt-2 space-y-3">
+                <h3 className="text-sm font-bold text-purple-400 uppercase tracking-wider flex items-center gap-2">
+                    <Gavel size={16}/> Live Auction (Sealed Bids)
+                </h3>
+                {lots.map(lot => (
+                    <div key={lot.lot_id} className="space-y-2">
+                        <div className="flex justify-between text-sm">
+                            <span className="text-white font-bold">{lot.name}</span>
+                            <span className="text-slate-400">{lot.debt_effect} Debt · Min ${lot.reserve}</span>
+                        </div>
+                        <div className="flex gap-2">
+                            <input type="number"
+                                className="flex-1 bg-slate-950 border border-slate-700 rounded-lg px-4 py-2 text-white outline-none focus:border-purple-500 font-mono"
+                                placeholder="Your bid ($)"
+                                value={bids[lot.lot_id] || ""} onChange={(e) => setBids({ ...bids, [lot.lot_id]: e.target.value })}
+                            />
+                            <button onClick={() => placeBid(lot)} className="bg-purple-600 hover:bg-purple-500 text-white px-6 rounded-lg font-bold">Bid</button>
+                        </div>
+                    </div>
+                ))}
+                <p className="text-xs text-slate-500">You can raise or lower your bid until the Game Master closes the lot.</p>
+            </div>
+        )}
+
         <div className="bg-slate-900 p-5 rounded-xl border border-dashed border-slate-700 mt-2 mb-2">
             <h3 className="text-sm font-bold text-purple-400 mb-3 uppercase tracking-wider flex items-center gap-2">
                 <Ticket size={16}/> Redeem Auction Code